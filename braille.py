@@ -0,0 +1,276 @@
+import PIL
+from PIL import Image
+import numpy as np
+import os
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+# Per-cell dot order (row-major 4x2) rearranged into braille bit order, LSB first
+_DOT_ORDER = np.array([0, 2, 4, 1, 3, 5, 6, 7])
+_BRAILLE_BASE = np.uint16(0x2800)
+
+# SWAR constants for the NumPy packer: one byte lane per dot in a uint64
+_LANE_ONES = np.uint64(0x0101010101010101)
+_LANE_HIGH = np.uint64(0x8080808080808080)
+_LANE_LOW7 = np.uint64(0x7F7F7F7F7F7F7F7F)
+# Multiplying 0/1 lanes by this sums lane k into bit 56 + k
+_LANE_GATHER = np.uint64(0x0102040810204080)
+
+_scratch = threading.local()
+
+def _scratch_buffer(name, shape):
+    """Per-thread uint8 buffer, reused across video frames of the same size."""
+    buffers = _scratch.__dict__.setdefault('buffers', {})
+    buf = buffers.get(name)
+    if buf is None or buf.shape != shape:
+        buf = buffers[name] = np.empty(shape, np.uint8)
+    return buf
+
+def _pad_to_cells(pixels, fill):
+    """Pad to whole 4x2 cells with a value that never sets a dot."""
+    pad_h = (-pixels.shape[0]) % 4
+    pad_w = (-pixels.shape[1]) % 2
+    if pad_h or pad_w:
+        pixels = np.pad(pixels, ((0, pad_h), (0, pad_w)), constant_values=fill)
+    return pixels
+
+def _pack_braille(pixels, threshold, invert, out):
+    """
+    Pack a (rows*4, cols*2) grayscale array into braille codepoints,
+    written to the (rows, cols) uint16 array out.
+    A dot is set where pixel < threshold, or where 255 - pixel < threshold
+    when inverting (folded into pixel > 255 - threshold).
+    Each cell's eight pixels become the byte lanes of one uint64, in braille
+    bit order, so all eight compares and the bit packing are a few word ops.
+    """
+    height = pixels.shape[0] // 4
+    cells = pixels.reshape(height, 4, -1, 2).transpose(0, 2, 1, 3).reshape(height, -1, 8)
+    lanes = np.ascontiguousarray(cells[..., _DOT_ORDER]).view('<u8')[..., 0]
+    
+    # p > 255 - t  <=>  not (p < 256 - t), so both modes share one compare
+    bound = 256 - threshold if invert else threshold
+    if 0 < bound < 256:
+        # x < bound  <=>  x + (256 - bound) does not carry out of the byte;
+        # that carry is the majority of both high bits and the low-7 carry
+        c = np.uint64(256 - bound) * _LANE_ONES
+        low = (lanes & _LANE_LOW7) + (c & _LANE_LOW7)
+        hits = ~((lanes & c) | ((lanes | c) & low)) & _LANE_HIGH
+    else:
+        hits = np.full(lanes.shape, _LANE_HIGH if bound >= 256 else 0, np.uint64)
+    if invert:
+        hits ^= _LANE_HIGH
+    
+    bits = ((hits >> np.uint64(7)) * _LANE_GATHER) >> np.uint64(56)
+    np.add(bits, _BRAILLE_BASE, out=out, casting='unsafe')
+
+def pack_braille(pixels, threshold=128, invert=False, packer=None):
+    """
+    Turn a 2-D uint8 grayscale array into a (rows, cols + 1) uint16 grid
+    of braille codepoints, with a newline codepoint closing each row.
+    packer swaps in another kernel with _pack_braille's signature.
+    """
+    # The pad value must never set a dot in either polarity
+    fill = 255 - threshold if invert else threshold
+    pixels = _pad_to_cells(pixels, fill)
+    
+    # Pack straight into the returned grid, next to its newline column
+    codepoints = np.empty((pixels.shape[0] // 4, pixels.shape[1] // 2 + 1), np.uint16)
+    codepoints[:, -1] = ord('\n')
+    (packer or _pack_braille)(pixels, threshold, invert, codepoints[:, :-1])
+    return codepoints
+
+def codepoints_to_text(codepoints):
+    """Braille lives in the BMP, so a uint16 grid decodes straight to text."""
+    return codepoints.astype('<u2', copy=False).tobytes().decode('utf-16-le')
+
+def codepoints_to_utf8(codepoints):
+    """
+    UTF-8 encode a codepoint grid from pack_braille without going
+    through str: U+2800..U+28FF is always E2, A0|bits>>6, 80|bits&3F.
+    """
+    bits = codepoints[:, :-1] - _BRAILLE_BASE
+    rows, cols = bits.shape
+    encoded = np.empty((rows, cols * 3 + 1), dtype=np.uint8)
+    cells = encoded[:, :-1].reshape(rows, cols, 3)
+    cells[..., 0] = 0xE2
+    cells[..., 1] = 0xA0 | (bits >> 6)
+    cells[..., 2] = 0x80 | (bits & 0x3F)
+    encoded[:, -1] = ord('\n')
+    return encoded.tobytes()
+
+def image_to_codepoints(image_path, width=100, threshold=128, invert=False,
+                        resample=Image.Resampling.BILINEAR):
+    """
+    Convert an image to a (rows, cols + 1) uint16 grid of braille
+    codepoints, with a newline codepoint closing each row.
+    Uses black background for transparent areas.
+    """
+    # Open image
+    img = Image.open(image_path)
+    
+    aspect_ratio = img.height / img.width
+    height = int(width * aspect_ratio * 0.5)
+    
+    # The default BILINEAR path trades exactness for speed: JPEGs decode at
+    # reduced scale, and the resize box-downsamples first. Any other
+    # resample filter gets the plain full-resolution resize
+    fast = resample == Image.Resampling.BILINEAR
+    
+    # Let JPEGs decode at reduced scale (and straight to L) when the
+    # output is much smaller; draft() is a no-op for other formats
+    if fast and img.mode not in ('RGBA', 'LA', 'P'):
+        img.draft('L', (width, height * 4))
+    
+    # Handle transparency with BLACK background, composited after the
+    # resize so the multiply only touches the small image
+    has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+    if has_alpha:
+        # Pillow resizes RGBA premultiplied, so edges don't pick up hidden colour
+        img = img.convert('RGBA')
+    else:
+        # Resize in L: Pillow would fall back to NEAREST for P and 1 images
+        img = img.convert('L')
+    
+    # reducing_gap box-downsamples by an integer factor first, then
+    # filters the remainder; detail beyond that is lost to the threshold
+    img = img.resize((width, height * 4), resample, reducing_gap=2.0 if fast else None)
+    
+    if has_alpha:
+        # gray * alpha / 255 over black
+        pixels = np.asarray(img.convert('L'), dtype=np.uint16)
+        alpha = np.asarray(img.getchannel('A'), dtype=np.uint16)
+        pixels = ((pixels * alpha + 127) // 255).astype(np.uint8)
+    else:
+        pixels = np.asarray(img, dtype=np.uint8)
+    
+    return pack_braille(pixels, threshold, invert)
+
+def image_to_braille(image_path, width=100, threshold=128, invert=False,
+                     resample=Image.Resampling.BILINEAR):
+    """
+    Convert an image to braille ASCII art.
+    Uses black background for transparent areas.
+    Pass resample=Image.Resampling.LANCZOS for the slower, sharper filter
+    (this also skips the default path's JPEG draft decode and box pre-reduce).
+    """
+    try:
+        return codepoints_to_text(image_to_codepoints(image_path, width, threshold, invert, resample))
+    
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+def image_to_braille_to_file(image_path, filename="braille_output.txt", width=100,
+                             threshold=128, invert=False,
+                             resample=Image.Resampling.BILINEAR):
+    """
+    Convert an image and write the braille art straight to a UTF-8 file,
+    without handing a str back to the caller. Errors are raised, not written.
+    """
+    out = image_to_codepoints(image_path, width, threshold, invert, resample)
+    with open(filename, 'wb') as f:
+        f.write(codepoints_to_utf8(out))
+    return filename
+
+def image_to_braille_batch(image_paths, max_workers=None, **kwargs):
+    """
+    Convert many images at once, returning their braille art in input order.
+    Threads are enough here: Pillow's decode/resize and NumPy's ufuncs
+    release the GIL, so the heavy parts run in parallel without the
+    process startup and pickling a process pool would add.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        return list(executor.map(lambda path: image_to_braille(path, **kwargs), image_paths))
+
+def save_braille_to_file(braille_text, filename="braille_output.txt"):
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(braille_text)
+    return filename
+
+def pillow_simd_available():
+    """True under Pillow-SIMD, whose releases are tagged .postN; stock Pillow never is."""
+    return '.post' in PIL.__version__
+
+# OpenCV is imported inside the frame functions: only videos need it, and
+# loading it would triple the start-up time of a one-off image conversion
+
+def gpu_available():
+    """True when OpenCV was built with CUDA and can see a device."""
+    try:
+        import cv2
+    except ImportError:
+        return False
+    return hasattr(cv2, 'cuda') and cv2.cuda.getCudaEnabledDeviceCount() > 0
+
+def _gray_resize_gpu(frame, size, interpolation, bgr=False):
+    """
+    Grayscale + resize on the GPU; only the small result comes back.
+    Takes a host RGB (or BGR)/gray array, or a BGRA GpuMat already decoded on the device.
+    """
+    import cv2
+    if isinstance(frame, np.ndarray):
+        gpu_frame = cv2.cuda_GpuMat()
+        gpu_frame.upload(frame)
+        if frame.ndim == 3:
+            gpu_frame = cv2.cuda.cvtColor(gpu_frame, cv2.COLOR_BGR2GRAY if bgr else cv2.COLOR_RGB2GRAY)
+    else:
+        gpu_frame = cv2.cuda.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+    return cv2.cuda.resize(gpu_frame, size, interpolation=interpolation).download()
+
+def _to_gray(frame, gray, bgr=False):
+    """Collapse an RGB (or BGR)/gray frame to one 8-bit channel, colour into the gray buffer."""
+    import cv2
+    if frame.ndim == 3:
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY if bgr else cv2.COLOR_RGB2GRAY, dst=gray)
+    return frame
+
+def _composite_on_white(rgba, bgr=False):
+    """Handle transparency - treat as WHITE: 255 - (255 - gray) * alpha / 255."""
+    import cv2
+    ink = 255 - cv2.cvtColor(rgba, cv2.COLOR_BGRA2GRAY if bgr else cv2.COLOR_RGBA2GRAY).astype(np.uint16)
+    return (255 - (ink * rgba[..., 3] + 127) // 255).astype(np.uint8)
+
+def make_frame_to_braille(in_w, in_h, width=60, threshold=254, interpolation=None, gpu=False, bgr=False,
+                          packer=None):
+    """
+    Build a converter for a stream of in_w x in_h video frames, returning
+    codepoint grids like frame_to_codepoints. The output size and scratch
+    buffers are worked out once here instead of on every frame; call the
+    converter from the thread that built it, since it reuses those buffers.
+    Pass bgr=True to feed frames straight from cv2.VideoCapture; packer is
+    handed on to pack_braille.
+    """
+    import cv2
+    
+    if interpolation is None:
+        interpolation = cv2.INTER_AREA
+    
+    height = int(width * (in_h / in_w) * 0.5)
+    size = (width, height * 4)
+    gray = _scratch_buffer('gray', (in_h, in_w))
+    small = _scratch_buffer('small', (size[1], size[0]))
+    resize = cv2.resize
+    
+    def convert(frame):
+        if isinstance(frame, np.ndarray) and frame.ndim == 3 and frame.shape[2] == 4:
+            # Composite on the resized frame rather than at full resolution
+            pixels = _composite_on_white(resize(frame, size, interpolation=interpolation), bgr)
+        elif gpu:
+            pixels = _gray_resize_gpu(frame, size, interpolation, bgr)
+        else:
+            pixels = resize(_to_gray(frame, gray, bgr), size, dst=small, interpolation=interpolation)
+        return pack_braille(pixels, threshold, packer=packer)
+    
+    return convert
+
+def frame_to_codepoints(frame, width=60, interpolation=None, gpu=False):
+    """
+    Convert a video frame to a braille codepoint grid (see pack_braille).
+    Needs OpenCV; interpolation defaults to cv2.INTER_AREA.
+    """
+    # WHITE (255) = NO DOT, anything else = DOT
+    convert = make_frame_to_braille(frame.shape[1], frame.shape[0], width, 254, interpolation, gpu)
+    return convert(frame)
+
+def frame_to_braille(frame, width=60, interpolation=None, gpu=False):
+    """Convert video frames to braille ASCII text frames."""
+    return codepoints_to_text(frame_to_codepoints(frame, width, interpolation, gpu)).strip()
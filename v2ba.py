@@ -1,52 +1,196 @@
 import cv2
 import numpy as np
-from PIL import Image
 import os
+import argparse
+import base64
+import io
+import itertools
+import json
+import multiprocessing
+import queue
+import tarfile
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, closing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-def frame_to_braille(frame, width=60):
-    """Convert video frames to braille ASCII text frames."""
-    img = Image.fromarray(frame)
+from braille import codepoints_to_utf8, gpu_available, make_frame_to_braille
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True, boundscheck=False)
+    def pack_rows(pixels, threshold, invert, out):
+        """
+        Native-code drop-in for braille's NumPy packer, used for video frames
+        when numba is installed: one cell at a time, eight plain compares.
+        """
+        # p > 255 - t  <=>  not (p < 256 - t), so both modes share one compare
+        bound = 256 - threshold if invert else threshold
+        height = pixels.shape[0] // 4
+        cols = pixels.shape[1] // 2
+        for y in range(height):
+            r = pixels[y * 4:y * 4 + 4]
+            for x in range(cols):
+                c = x * 2
+                bits = 0
+                if (r[0, c] < bound) != invert: bits |= 0x01
+                if (r[1, c] < bound) != invert: bits |= 0x02
+                if (r[2, c] < bound) != invert: bits |= 0x04
+                if (r[0, c + 1] < bound) != invert: bits |= 0x08
+                if (r[1, c + 1] < bound) != invert: bits |= 0x10
+                if (r[2, c + 1] < bound) != invert: bits |= 0x20
+                if (r[3, c] < bound) != invert: bits |= 0x40
+                if (r[3, c + 1] < bound) != invert: bits |= 0x80
+                out[y, x] = 0x2800 | bits
+else:
+    pack_rows = None  # pack_braille falls back to its own packer
+
+def read_frames(cap, frame_skip, video_fps, max_duration=15):
+    """Yield every frame_skip-th frame of an open capture, as decoded (BGR)."""
+    frame_count = 0
+    while True:
+        # grab() demuxes without decoding; only kept frames pay for retrieve()
+        if not cap.grab():
+            break
+        
+        if max_duration > 0 and frame_count / video_fps > max_duration:
+            break
+        
+        if frame_count % frame_skip == 0:
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            yield frame
+        
+        frame_count += 1
+
+def open_gpu_reader(video_path):
+    """NVDEC reader from cv2.cudacodec, or None when OpenCV was built without it."""
+    if not hasattr(cv2, 'cudacodec'):
+        return None
+    try:
+        return cv2.cudacodec.createVideoReader(video_path)
+    except cv2.error:
+        return None
+
+def read_gpu_frames(reader, frame_skip, video_fps, max_duration=15):
+    """Like read_frames, but frames are decoded on the GPU and stay there as BGRA GpuMats."""
+    frame_count = 0
+    while True:
+        ret, frame = reader.nextFrame()
+        if not ret:
+            break
+        
+        if max_duration > 0 and frame_count / video_fps > max_duration:
+            break
+        
+        if frame_count % frame_skip == 0:
+            yield frame
+        
+        frame_count += 1
+
+def prefetch(frames, maxsize=16):
+    """
+    Drain a frame generator on a background thread, buffering up to maxsize
+    frames, so decoding overlaps conversion (cv2 releases the GIL while decoding).
+    Closing the returned generator stops the reader and waits for it.
+    """
+    frame_queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    error = None
     
-    # Handle transparency - treat as WHITE
-    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-        background = Image.new('RGB', img.size, (255, 255, 255))
-        if img.mode == 'P':
-            img = img.convert('RGBA')
-        elif img.mode == 'LA':
-            img = img.convert('RGBA')
-        background.paste(img, (0, 0), img)
-        img = background.convert('L')
-    else:
-        img = img.convert('L')
+    def put(item):
+        # Give up once the consumer has gone, rather than block on a full queue
+        while not stop.is_set():
+            try:
+                frame_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def fill():
+        nonlocal error
+        try:
+            for frame in frames:
+                if not put(frame):
+                    return
+        except BaseException as e:
+            error = e
+        finally:
+            put(None)
     
-    aspect = img.height / img.width
-    height = int(width * aspect * 0.5)
-    img = img.resize((width, height * 4), Image.Resampling.LANCZOS)
-    pixels = np.array(img)
+    reader = threading.Thread(target=fill, daemon=True)
+    reader.start()
+    try:
+        while (frame := frame_queue.get()) is not None:
+            yield frame
+    finally:
+        stop.set()
+        reader.join()
     
-    braille_text = ""
-    for y in range(0, height * 4, 4):
-        row = ""
-        for x in range(0, width, 2):
-            block = pixels[y:min(y+4, pixels.shape[0]), x:min(x+2, pixels.shape[1])]
-            bits = 0
-            if block.shape[0] > 0 and block.shape[1] > 0:
-                # WHITE (255) = NO DOT, anything else = DOT
-                if block[0, 0] < 254: bits |= 0b00000001
-                if block.shape[0] > 1 and block[1, 0] < 254: bits |= 0b00000010
-                if block.shape[0] > 2 and block[2, 0] < 254: bits |= 0b00000100
-                if block.shape[1] > 1 and block[0, 1] < 254: bits |= 0b00001000
-                if block.shape[0] > 1 and block.shape[1] > 1 and block[1, 1] < 254: bits |= 0b00010000
-                if block.shape[0] > 2 and block.shape[1] > 1 and block[2, 1] < 254: bits |= 0b00100000
-                if block.shape[0] > 3 and block[3, 0] < 254: bits |= 0b01000000
-                if block.shape[0] > 3 and block.shape[1] > 1 and block[3, 1] < 254: bits |= 0b10000000
-            row += chr(0x2800 + bits)
-        braille_text += row + "\n"
+    # A decode error ends the stream too; don't let it pass as a short video
+    if error is not None:
+        raise error
+
+_convert = None
+
+def start_worker(in_w, in_h, width):
+    """Pool initializer: build this worker's converter once for the whole video."""
+    global _convert
+    _convert = make_frame_to_braille(in_w, in_h, width, bgr=True, packer=pack_rows)
+
+def convert_frame(frame):
+    return _convert(frame)
+
+def write_frame(output_dir, index, codepoints, json_file, archive=None):
+    """
+    Write one frame as text, into the tar archive if one is open,
+    and append its packed form to frames.json.
+    """
+    frame_filename = f"frame_{index:04d}.txt"
+    # Encoded straight from the codepoints, minus the last row's newline
+    data = codepoints_to_utf8(codepoints)[:-1]
+    if archive is not None:
+        info = tarfile.TarInfo(frame_filename)
+        info.size = len(data)
+        # Extract like the per-file output would be written
+        info.mtime = time.time()
+        info.mode = 0o644
+        archive.addfile(info, io.BytesIO(data))
+    else:
+        # A raw fd skips the text layer's encoder, buffer and lock for one write
+        fd = os.open(os.path.join(output_dir, frame_filename),
+                     os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+        try:
+            # os.write may write less than asked; keep going until it's all out
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
     
-    return braille_text.strip()
+    # One byte per cell (the dot bits) instead of three bytes of UTF-8
+    bits = (codepoints[:, :-1] - 0x2800).astype(np.uint8)
+    entry = {
+        "name": frame_filename,
+        "shape": bits.shape,
+        "data": base64.b64encode(bits.tobytes()).decode('ascii'),
+    }
+    json_file.write((',' if index else '') + json.dumps(entry, separators=(',', ':')))
 
-def video_to_frames(video_path, output_dir="frames", fps=10, width=60, max_duration=15):
-    """Convert video to braille frames."""
+def video_to_frames(video_path, output_dir="frames", fps=10, width=60, max_duration=15, workers=None, gpu=False,
+                    tar=False):
+    """
+    Convert video to braille frames, in this process (on the GPU with gpu=True),
+    or over a process pool of workers > 1.
+    With tar=True the .txt frames go into one frames.tar instead of a file each.
+    """
     os.makedirs(output_dir, exist_ok=True)
     
     cap = cv2.VideoCapture(video_path)
@@ -54,42 +198,99 @@ def video_to_frames(video_path, output_dir="frames", fps=10, width=60, max_durat
         print(f"❌ Cannot open video: {video_path}")
         return
     
+    if gpu and not gpu_available():
+        print("⚠️ No CUDA-enabled OpenCV device found, falling back to CPU")
+        gpu = False
+    
     video_fps = int(cap.get(cv2.CAP_PROP_FPS))
+    in_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    in_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     frame_skip = max(1, video_fps // fps)
-    
-    frame_count = 0
-    extracted_count = 0
+    # The rate frames are actually sampled at, which the player plays back
+    sample_fps = round(cap.get(cv2.CAP_PROP_FPS) / frame_skip, 2)
+    workers = workers or 1
     
     print(f"Processing: {video_path}")
     print(f"Original FPS: {video_fps}")
     print(f"Extracting at: {fps} FPS, Width: {width} chars")
+    print("Device: GPU" if gpu else f"Workers: {workers}")
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    # Stream frames.json entry by entry so nothing accumulates in memory.
+    # On the way out, even after an error, the writer drains first, then the
+    # archive and the JSON array are closed over whatever frames were written,
+    # then the reader stops and the capture is released
+    with ExitStack() as stack:
+        stack.callback(cap.release)
         
-        if max_duration > 0 and frame_count / video_fps > max_duration:
-            break
+        reader = open_gpu_reader(video_path) if gpu else None
+        if reader is not None:
+            # Decode, grayscale and resize all on the device; only the small frame is downloaded
+            frames = read_gpu_frames(reader, frame_skip, video_fps, max_duration)
+        else:
+            frames = prefetch(read_frames(cap, frame_skip, video_fps, max_duration))
+        # Closed before cap is released, so the reader thread is done with it
+        stack.enter_context(closing(frames))
         
-        if frame_count % frame_skip == 0:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            braille_text = frame_to_braille(frame_rgb, width=width)
-            
-            frame_filename = f"frame_{extracted_count:04d}.txt"
-            frame_path = os.path.join(output_dir, frame_filename)
-            with open(frame_path, 'w', encoding='utf-8') as f:
-                f.write(braille_text)
-            
-            extracted_count += 1
+        if not (in_w and in_h):
+            # Some backends don't report the frame size; take it from the first frame
+            first = next(frames, None)
+            if first is not None:
+                in_w, in_h = first.size() if reader is not None else (first.shape[1], first.shape[0])
+                frames = itertools.chain([first], frames)
         
-        frame_count += 1
+        json_file = stack.enter_context(open(os.path.join(output_dir, "frames.json"), 'w', encoding='utf-8'))
+        json_file.write(f'{{"fps":{sample_fps},"frames":[')
+        stack.callback(json_file.write, ']}')
+        archive = tarfile.open(os.path.join(output_dir, "frames.tar"), 'w') if tar else None
+        if archive is not None:
+            stack.callback(archive.close)
+        writer = stack.enter_context(ThreadPoolExecutor(max_workers=1))
+        writes = []
+        
+        def emit(codepoints):
+            # One writer thread keeps files and JSON entries in frame order
+            writes.append(writer.submit(write_frame, output_dir, len(writes), codepoints, json_file, archive))
+        
+        if gpu or workers == 1:
+            # Convert here: pickling a frame to a worker costs about as much as
+            # converting it, and decoding stays in this process either way.
+            # The converter waits for a frame, so an empty video never needs a size
+            convert = None
+            for frame in frames:
+                convert = convert or make_frame_to_braille(in_w, in_h, width, gpu=gpu, bgr=True, packer=pack_rows)
+                emit(convert(frame))
+        else:
+            # Convert in the pool; cap in-flight frames to bound memory.
+            # Workers start on demand while the reader thread is inside cv2,
+            # so they must not be forked from this multi-threaded process
+            context = multiprocessing.get_context('forkserver') \
+                if 'forkserver' in multiprocessing.get_all_start_methods() else None
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=start_worker,
+                                     initargs=(in_w, in_h, width)) as executor:
+                pending = deque()
+                for frame in frames:
+                    pending.append(executor.submit(convert_frame, frame))
+                    if len(pending) >= workers * 4:
+                        emit(pending.popleft().result())
+                
+                while pending:
+                    emit(pending.popleft().result())
+        
+        for write in writes:
+            write.result()
     
-    cap.release()
+    extracted_count = len(writes)
     print(f"✅ Created {extracted_count} frames in '{output_dir}/'")
     return extracted_count
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the first video in this folder to braille frames.")
+    parser.add_argument('--gpu', action='store_true', help="decode, grayscale + resize on a CUDA device via cv2.cudacodec / cv2.cuda")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="convert over a pool of this many processes (rarely faster than one)")
+    parser.add_argument('--tar', action='store_true', help="pack the .txt frames into frames/frames.tar")
+    args = parser.parse_args()
+    
     video_exts = ('.mp4', '.avi', '.mov', '.mkv', '.gif', '.webm')
     video_files = [f for f in os.listdir() if f.lower().endswith(video_exts)]
     
@@ -104,5 +305,8 @@ if __name__ == "__main__":
         output_dir="frames",
         fps=10,
         width=60,
-        max_duration=15
+        max_duration=15,
+        workers=args.workers,
+        gpu=args.gpu,
+        tar=args.tar
     )
\ No newline at end of file